@@ -0,0 +1,96 @@
+"""
+Deployment settings for RAG Assistant
+
+Every setting can be overridden with an environment variable so a deployment
+can be tuned without code changes.
+"""
+import os
+
+
+def _env_flag(name, default):
+    """Read a boolean setting from the environment"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name, default):
+    """Read an integer setting from the environment"""
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name, default):
+    """Read a decimal setting from the environment"""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# Embeddings
+EMBEDDING_MODEL = os.environ.get("RAG_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_BACKEND = os.environ.get("RAG_EMBEDDING_BACKEND", "torch")  # "torch" or "onnx"
+EMBEDDING_QUANTIZE = _env_flag("RAG_EMBEDDING_QUANTIZE", True)
+EMBEDDING_BATCH_SIZE = _env_int("RAG_EMBEDDING_BATCH_SIZE", 64)
+EMBEDDING_MAX_LENGTH = _env_int("RAG_EMBEDDING_MAX_LENGTH", 256)
+
+# Chunking
+CHUNK_SIZE = _env_int("RAG_CHUNK_SIZE", 1000)
+CHUNK_OVERLAP = _env_int("RAG_CHUNK_OVERLAP", 200)
+
+# Vector stores and shared index bundles
+VECTOR_STORE_DIR = os.environ.get("RAG_VECTOR_STORE_DIR", ".")
+INDEX_BUNDLE_DIR = os.environ.get("RAG_INDEX_BUNDLE_DIR", "")  # shared directory, empty to disable
+INDEX_BUNDLE_PUBLISH = _env_flag("RAG_INDEX_BUNDLE_PUBLISH", False)
+
+# Retrieval
+RETRIEVAL_K = _env_int("RAG_RETRIEVAL_K", 4)
+
+# Cross-encoder re-ranking
+RERANK_ENABLED = _env_flag("RAG_RERANK", False)
+RERANK_MODEL = os.environ.get("RAG_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_BACKEND = os.environ.get("RAG_RERANK_BACKEND", "torch")  # "torch" or "onnx"
+RERANK_QUANTIZE = _env_flag("RAG_RERANK_QUANTIZE", True)
+RERANK_FETCH_K = _env_int("RAG_RERANK_FETCH_K", 20)
+RERANK_TOP_N = _env_int("RAG_RERANK_TOP_N", 3)
+RERANK_BATCH_SIZE = _env_int("RAG_RERANK_BATCH_SIZE", 16)
+RERANK_CACHE_SIZE = _env_int("RAG_RERANK_CACHE_SIZE", 4096)
+
+# Conversation memory
+CONVERSATION_ENABLED = _env_flag("RAG_CONVERSATION", True)
+CONVERSATION_DIR = os.environ.get("RAG_CONVERSATION_DIR", "chat_history")
+CONVERSATION_TOKEN_BUDGET = _env_int("RAG_CONVERSATION_TOKEN_BUDGET", 600)
+
+# Speculative retrieval while the user is typing
+PREFETCH_ENABLED = _env_flag("RAG_PREFETCH", True)
+PREFETCH_DEBOUNCE_MS = _env_int("RAG_PREFETCH_DEBOUNCE_MS", 400)
+PREFETCH_MIN_CHARS = _env_int("RAG_PREFETCH_MIN_CHARS", 12)
+
+# Ollama runtime
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+if "://" not in OLLAMA_HOST:
+    OLLAMA_HOST = f"http://{OLLAMA_HOST}"
+OLLAMA_KEEP_ALIVE = os.environ.get("RAG_OLLAMA_KEEP_ALIVE", "10m")
+KEEP_ALIVE_HEARTBEAT_SECONDS = _env_int("RAG_KEEP_ALIVE_HEARTBEAT", 240)  # 0 disables
+NUM_CTX = _env_int("RAG_NUM_CTX", 0)  # 0 uses the per-model default
+DEFAULT_NUM_PREDICT = _env_int("RAG_NUM_PREDICT", 512)
+
+# Routing between a fast and a strong model
+ROUTING_FAST_MODEL = os.environ.get("RAG_FAST_MODEL", "")  # empty disables routing
+ROUTING_FAST_MAX_WORDS = _env_int("RAG_ROUTING_FAST_MAX_WORDS", 30)
+# Retrieval thresholds are per score type: cosine similarity for plain
+# FAISS retrieval, raw cross-encoder logits when re-ranking is enabled
+ROUTING_MIN_RELEVANCE = _env_float("RAG_ROUTING_MIN_RELEVANCE", 0.3)
+ROUTING_MIN_MARGIN = _env_float("RAG_ROUTING_MIN_MARGIN", 0.01)
+ROUTING_RERANK_MIN_SCORE = _env_float("RAG_ROUTING_RERANK_MIN_SCORE", 0.0)
+ROUTING_RERANK_MIN_MARGIN = _env_float("RAG_ROUTING_RERANK_MIN_MARGIN", 1.0)
+ROUTING_CACHE_SIZE = _env_int("RAG_ROUTING_CACHE_SIZE", 256)
+ROUTING_LOG = os.environ.get("RAG_ROUTING_LOG", "routing_log.jsonl")  # empty disables
+
+# Local model cache (ONNX exports and quantized weights)
+MODEL_CACHE_DIR = os.environ.get("RAG_MODEL_CACHE_DIR", "model_cache")
+CPU_THREADS = _env_int("RAG_CPU_THREADS", 0)  # 0 lets the runtime decide
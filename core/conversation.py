@@ -0,0 +1,190 @@
+"""
+Conversation memory for follow-up questions
+"""
+import json
+import os
+import re
+import uuid
+from datetime import datetime
+from .config import CONVERSATION_DIR, CONVERSATION_TOKEN_BUDGET
+
+FOLLOW_UP_WORDS = {
+    "it", "its", "they", "them", "their", "this", "that", "these", "those",
+    "he", "she", "him", "her", "his", "hers", "there", "one", "ones"
+}
+FOLLOW_UP_PREFIXES = ("and ", "also ", "what about", "how about", "then ")
+# Words that only refer back when they stand alone, not before a noun ("these documents")
+DETERMINERS = {"this", "that", "these", "those", "one", "ones"}
+BE_WORDS = {"is", "are", "was", "were", "be"}
+FOLLOW_UP_MAX_KEYWORDS = 3  # more content words than this and the question names its own topic
+STOP_WORDS = FOLLOW_UP_WORDS | {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "do", "does", "did",
+    "what", "which", "who", "whom", "how", "why", "when", "where", "of", "in", "on",
+    "at", "to", "for", "from", "with", "about", "and", "or", "but", "can", "could",
+    "should", "would", "will", "me", "my", "i", "you", "your", "we", "our", "tell",
+    "explain", "describe", "please", "more", "also", "any", "some", "there"
+}
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)"""
+    return len(text) // 4 + 1 if text else 0
+
+
+def _keywords(text, limit=8):
+    """Content words of a text, in order of first appearance"""
+    seen = []
+    for word in re.findall(r"[A-Za-z0-9']+", text.lower()):
+        if word not in STOP_WORDS and len(word) > 1 and word not in seen:
+            seen.append(word)
+    return seen[:limit]
+
+
+def _refers_back(words):
+    """Whether any word points at something from an earlier turn
+
+    Existential "there" ("is there a ...") and determiners followed by a
+    content word ("these documents") don't count.
+    """
+    for i, word in enumerate(words):
+        if word not in FOLLOW_UP_WORDS:
+            continue
+        previous = words[i - 1] if i > 0 else ""
+        following = words[i + 1] if i + 1 < len(words) else ""
+        if word == "there" and (previous in BE_WORDS or following in BE_WORDS):
+            continue
+        if word in DETERMINERS and following and following not in STOP_WORDS:
+            continue
+        return True
+    return False
+
+
+def _first_sentence(text, max_words=30):
+    """First sentence of a text, capped at max_words"""
+    sentence = re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0]
+    words = sentence.split()
+    if len(words) > max_words:
+        return " ".join(words[:max_words]) + "..."
+    return sentence
+
+
+class ConversationSession:
+    """Per-chat history with a rolling summary kept within a token budget"""
+
+    def __init__(self, session_id=None, storage_dir=CONVERSATION_DIR,
+                 token_budget=CONVERSATION_TOKEN_BUDGET):
+        self.session_id = session_id or datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        self.storage_dir = storage_dir
+        self.token_budget = token_budget
+        self.summary = ""
+        self.turns = []
+
+    @property
+    def path(self):
+        return os.path.join(self.storage_dir, f"{self.session_id}.json")
+
+    @classmethod
+    def load(cls, session_id, storage_dir=CONVERSATION_DIR, token_budget=CONVERSATION_TOKEN_BUDGET):
+        """Load a saved session, or start an empty one with that id"""
+        session = cls(session_id, storage_dir, token_budget)
+        try:
+            with open(session.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            session.summary = data.get("summary", "")
+            session.turns = data.get("turns", [])
+        except (OSError, ValueError):
+            pass
+        return session
+
+    def save(self):
+        """Persist the session to disk"""
+        try:
+            os.makedirs(self.storage_dir, exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"session_id": self.session_id, "summary": self.summary,
+                           "turns": self.turns}, f, indent=2)
+        except OSError as e:
+            print(f"Error saving conversation {self.session_id}: {e}")
+
+    def is_follow_up(self, question):
+        """Cheap check for questions that lean on earlier turns
+
+        A question counts as a follow-up when it opens like one ("what
+        about ...") or refers back with a pronoun ("how many people live
+        there?"), unless it has enough content words to name its own topic.
+        """
+        if len(_keywords(question)) > FOLLOW_UP_MAX_KEYWORDS:
+            return False
+        lowered = question.lower().strip()
+        return lowered.startswith(FOLLOW_UP_PREFIXES) or _refers_back(re.findall(r"[a-z']+", lowered))
+
+    def condense_question(self, question):
+        """Turn a follow-up into a standalone retrieval query without an LLM call
+
+        The previous turn's retrieval query supplies the topic keywords the
+        follow-up refers to; a standalone question is returned unchanged.
+        """
+        if not self.turns or not self.is_follow_up(question):
+            return question
+        previous = self.turns[-1]["standalone"]
+        topic = [word for word in _keywords(previous) if word not in question.lower()]
+        if not topic:
+            return question
+        return f"{' '.join(topic)} {question}"
+
+    def history_text(self):
+        """Summary of older turns followed by the recent turns verbatim"""
+        lines = []
+        if self.summary:
+            lines.append(f"Earlier: {self.summary}")
+        for turn in self.turns:
+            lines.append(f"User: {turn['question']}")
+            lines.append(f"Assistant: {turn['answer']}")
+        return "\n".join(lines)
+
+    def add_turn(self, question, standalone, answer):
+        """Record a turn and compact history back under the token budget"""
+        self.turns.append({"question": question, "standalone": standalone, "answer": answer})
+        self._compact()
+
+    def clear(self):
+        """Forget all history"""
+        self.summary = ""
+        self.turns = []
+
+    def _compact(self):
+        """Fold the oldest turns into the summary until history fits the budget"""
+        while len(self.turns) > 1 and estimate_tokens(self.history_text()) > self.token_budget:
+            turn = self.turns.pop(0)
+            note = f"Q: {turn['question']} A: {_first_sentence(turn['answer'])}"
+            self.summary = f"{self.summary} {note}".strip()
+
+        # Keep the summary to half the budget, dropping its oldest notes first
+        max_chars = self.token_budget * 2
+        if len(self.summary) > max_chars:
+            self.summary = "..." + self.summary[-max_chars:]
+
+
+class ConversationalAssistant:
+    """Wraps a RAGAssistant so each question sees the conversation so far"""
+
+    def __init__(self, assistant, session):
+        self.assistant = assistant
+        self.session = session
+
+    def retrieve(self, query):
+        """Retrieve source chunks for the standalone form of a question"""
+        return self.assistant.retrieve(self.session.condense_question(query))
+
+    def invoke(self, inputs):
+        """Answer a question in the context of the session"""
+        question = inputs["query"]
+        standalone = self.session.condense_question(question)
+        result = self.assistant.invoke({
+            **inputs,
+            "retrieval_query": standalone,
+            "history": self.session.history_text()
+        })
+        self.session.add_turn(question, standalone, result["result"])
+        self.session.save()
+        return result
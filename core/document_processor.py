@@ -5,13 +5,23 @@ import os
 from .text_loader import RobustTextLoader
 from .ollama_manager import OllamaManager
 from .rag_pipeline import RAGPipeline
+from .folder_scanner import folder_scanner
+from .config import ROUTING_FAST_MODEL
 
 class DocumentProcessor:
     def __init__(self):
         self.ollama_manager = OllamaManager()
         
-    def initialize_system(self, folder_path, model_name, status_callback=None):
-        """Initialize the complete RAG system"""
+    def initialize_system(self, folder_path, model_name, status_callback=None,
+                          fast_model=ROUTING_FAST_MODEL):
+        """Initialize the complete RAG system
+        
+        The folder is rescanned so files added or edited since it was browsed
+        are picked up; directory listings cached by that first scan make this
+        cheap. fast_model, if given, answers simple questions while
+        model_name handles the rest.
+        """
+        assistant = None
         try:
             # Step 1: Check Ollama
             if status_callback:
@@ -22,21 +32,24 @@ class DocumentProcessor:
             # Step 2: Check and download model if needed
             if status_callback:
                 status_callback("Checking model availability...")
-            if not self.ollama_manager.is_model_available(model_name):
-                if status_callback:
-                    status_callback(f"Downloading {model_name}... (This may take a while)")
-                if not self.ollama_manager.pull_model(model_name):
-                    raise Exception(f"Failed to download model: {model_name}")
+            for required_model in filter(None, [model_name, fast_model]):
+                if not self.ollama_manager.is_model_available(required_model):
+                    if status_callback:
+                        status_callback(f"Downloading {required_model}... (This may take a while)")
+                    if not self.ollama_manager.pull_model(required_model):
+                        raise Exception(f"Failed to download model: {required_model}")
             
             # Step 3: Load documents
             if status_callback:
                 status_callback("Scanning and loading documents...")
-            text_files = self.get_all_text_files(folder_path)
+            snapshot = folder_scanner.scan(folder_path)
+            text_files = snapshot.text_file_paths()
             
             if not text_files:
                 if status_callback:
                     status_callback("Creating sample document...")
                 sample_file = self.create_sample_documents(folder_path)
+                snapshot = folder_scanner.scan(folder_path)
                 text_files = [sample_file]
             
             if status_callback:
@@ -52,36 +65,35 @@ class DocumentProcessor:
                 status_callback("Setting up RAG pipeline...")
             
             rag_pipeline = RAGPipeline()
-            assistant = rag_pipeline.create_pipeline(documents, model_name, folder_path)
+            assistant = rag_pipeline.create_pipeline(documents, model_name, folder_path, snapshot,
+                                                     fast_model)
             
             # Step 5: Test the system
             if status_callback:
                 status_callback("Testing system...")
             
-            test_result = assistant.invoke({"query": "Say 'hello' briefly"})
+            # Ask the selected model directly so the test stays out of routing stats and caches
+            test_result = assistant.invoke({"query": "Say 'hello' briefly", "max_tokens": 16,
+                                            "model": model_name})
             if not test_result or "result" not in test_result:
                 raise Exception("System test failed")
             
             # Prepare folder info for UI
             folder_name = os.path.basename(folder_path)
             folder_info = f"Documents: {folder_name} ({len(documents)} files) • 🤖 Model: {model_name}"
+            if assistant.router is not None:
+                folder_info += f" (fast: {fast_model})"
             
             return assistant, folder_info
             
         except Exception as e:
+            if assistant is not None:
+                assistant.close()
             raise Exception(f"Initialization failed: {str(e)}")
     
     def get_all_text_files(self, folder_path):
         """Get all text files from folder and subfolders"""
-        text_files = []
-        try:
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    if file.lower().endswith('.txt'):
-                        text_files.append(os.path.join(root, file))
-        except Exception as e:
-            print(f"Error scanning folder: {e}")
-        return text_files
+        return folder_scanner.scan(folder_path).text_file_paths()
     
     def load_documents(self, text_files):
         """Load documents with robust loader"""
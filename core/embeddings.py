@@ -0,0 +1,79 @@
+"""
+Pluggable embedding backends (PyTorch or ONNX Runtime)
+"""
+from typing import List
+from langchain.embeddings.base import Embeddings
+from .config import (EMBEDDING_MODEL, EMBEDDING_BACKEND, EMBEDDING_QUANTIZE,
+                     EMBEDDING_BATCH_SIZE, EMBEDDING_MAX_LENGTH, CPU_THREADS)
+
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence embeddings on ONNX Runtime with mean pooling, optionally int8 quantized"""
+
+    def __init__(self, model_name=EMBEDDING_MODEL, quantize=EMBEDDING_QUANTIZE,
+                 num_threads=CPU_THREADS, batch_size=EMBEDDING_BATCH_SIZE,
+                 max_length=EMBEDDING_MAX_LENGTH):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from .onnx_backend import load_onnx_model
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.model, self.tokenizer = load_onnx_model(
+            ORTModelForFeatureExtraction, model_name, "embed",
+            quantize=quantize, num_threads=num_threads
+        )
+
+    def _embed_batch(self, texts):
+        """Mean-pool token embeddings and L2-normalize, as sentence-transformers does"""
+        import numpy as np
+        inputs = self.tokenizer(texts, padding=True, truncation=True,
+                                max_length=self.max_length, return_tensors="np")
+        hidden = self.model(**inputs).last_hidden_state
+        mask = inputs["attention_mask"][..., None].astype(hidden.dtype)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return (pooled / norms).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in batches of similar length to keep padding small"""
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for index, vector in zip(batch, self._embed_batch([texts[i] for i in batch])):
+                vectors[index] = vector
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed_batch([text])[0]
+
+
+def _get_torch_embeddings(model_name):
+    """HuggingFace embeddings through sentence-transformers"""
+    if CPU_THREADS > 0:
+        import torch
+        torch.set_num_threads(CPU_THREADS)
+    kwargs = {
+        "model_name": model_name,
+        "model_kwargs": {"device": "cpu"},
+        "encode_kwargs": {"batch_size": EMBEDDING_BATCH_SIZE, "normalize_embeddings": True}
+    }
+    try:
+        from langchain_huggingface import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(**kwargs)
+    except ImportError:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(**kwargs)
+
+
+def get_embeddings(model_name=EMBEDDING_MODEL, backend=EMBEDDING_BACKEND):
+    """Get embeddings for the configured backend, falling back to PyTorch
+
+    Returns (embeddings, backend) so callers know which backend actually loaded.
+    """
+    if backend == "onnx":
+        try:
+            return OnnxEmbeddings(model_name), "onnx"
+        except ImportError as e:
+            print(f"ONNX Runtime not available for embeddings ({e}), using PyTorch")
+    return _get_torch_embeddings(model_name), "torch"
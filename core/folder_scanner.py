@@ -0,0 +1,108 @@
+"""
+Parallel, cached folder scanning shared by the UI and document loading
+"""
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+SUPPORTED_EXTENSIONS = (".txt",)
+
+FileEntry = namedtuple("FileEntry", ["path", "size", "mtime"])
+
+
+class FolderSnapshot:
+    """Every file under a folder, with the stat info gathered while scanning"""
+
+    def __init__(self, root, files):
+        self.root = root
+        self.files = files
+        self.text_files = sorted(
+            (entry for entry in files if entry.path.lower().endswith(SUPPORTED_EXTENSIONS)),
+            key=lambda entry: entry.path
+        )
+
+    @property
+    def total_files(self):
+        return len(self.files)
+
+    def text_file_paths(self):
+        return [entry.path for entry in self.text_files]
+
+    def file_stats(self):
+        """{path: [size, mtime]} for supported files, as stored in index manifests"""
+        return {entry.path: [entry.size, entry.mtime] for entry in self.text_files}
+
+
+class FolderScanner:
+    """Walks a tree with os.scandir, one thread per directory at each level
+
+    Each directory's listing (file names and subdirectories) is cached
+    against its mtime, so re-scanning an unchanged tree skips the directory
+    reads. Files are re-stat'ed on every scan because editing a file in
+    place does not change its directory's mtime.
+    """
+
+    def __init__(self, max_workers=8):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def scan(self, folder_path):
+        """Return a FolderSnapshot of folder_path and all its subfolders"""
+        files = []
+        level = [folder_path]
+        while level:
+            next_level = []
+            for dir_files, subdirs in self._executor.map(self._scan_dir, level):
+                files.extend(dir_files)
+                next_level.extend(subdirs)
+            level = next_level
+        return FolderSnapshot(folder_path, files)
+
+    def _scan_dir(self, path):
+        """Stat the files of one directory, listing it only if its mtime changed"""
+        file_paths, subdirs = self._list_dir(path)
+        files = []
+        for file_path in file_paths:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            files.append(FileEntry(file_path, stat.st_size, stat.st_mtime))
+        return files, subdirs
+
+    def _list_dir(self, path):
+        """(file paths, subdirectory paths) of one directory, cached by its mtime"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return [], []
+
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1], cached[2]
+
+        file_paths, subdirs = [], []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file():
+                            file_paths.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"Error scanning folder {path}: {e}")
+            return [], []
+
+        with self._lock:
+            self._cache[path] = (mtime, file_paths, subdirs)
+        return file_paths, subdirs
+
+
+# Shared instance so the setup screen and document loading reuse one cache
+folder_scanner = FolderScanner()
@@ -0,0 +1,102 @@
+"""
+Per-model Ollama generation settings and keep-alive heartbeat
+"""
+import re
+import threading
+from .ollama_manager import OllamaManager
+from .config import (OLLAMA_KEEP_ALIVE, KEEP_ALIVE_HEARTBEAT_SECONDS, NUM_CTX,
+                     DEFAULT_NUM_PREDICT, CPU_THREADS)
+
+# Context window per model family, sized for the stuffed chunks plus history.
+# A larger window costs memory and prompt-evaluation time on CPU.
+MODEL_NUM_CTX = {
+    "phi": 2048,
+    "llama2": 4096,
+    "codellama": 4096,
+    "mistral": 4096,
+    "gemma": 4096,
+    "llama3": 4096,
+    "qwen2": 4096,
+}
+DEFAULT_NUM_CTX = 4096
+
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value):
+    """Seconds in an Ollama keep_alive value ("10m", "1h30m", "300"), or None
+
+    Negative values keep the model loaded forever; unparseable values give None.
+    """
+    text = str(value).strip().lower()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|s|m|h)", text)
+    if not parts or "".join(number + unit for number, unit in parts) != text.lstrip("-"):
+        return None
+    seconds = sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+    return -seconds if text.startswith("-") else seconds
+
+
+class GenerationProfile:
+    """Runtime options sent to Ollama for one model"""
+
+    def __init__(self, model_name, temperature=0.1, num_predict=DEFAULT_NUM_PREDICT,
+                 num_ctx=None, num_thread=None, keep_alive=OLLAMA_KEEP_ALIVE):
+        family = model_name.split(":")[0]
+        self.model_name = model_name
+        self.temperature = temperature
+        self.num_predict = num_predict
+        self.num_ctx = num_ctx or NUM_CTX or MODEL_NUM_CTX.get(family, DEFAULT_NUM_CTX)
+        self.num_thread = num_thread or CPU_THREADS or None
+        self.keep_alive = keep_alive
+
+    def options(self, max_tokens=None):
+        """Ollama options, with num_predict capped to max_tokens when given"""
+        options = {
+            "temperature": self.temperature,
+            "num_predict": self.num_predict,
+            "num_ctx": self.num_ctx
+        }
+        if self.num_thread:
+            options["num_thread"] = self.num_thread
+        if max_tokens:
+            options["num_predict"] = min(max_tokens, self.num_predict)
+        return options
+
+
+class KeepAliveHeartbeat:
+    """Periodically re-pins a model so Ollama never unloads it while the app is open
+
+    The interval is capped at half the keep-alive, so a short
+    RAG_OLLAMA_KEEP_ALIVE doesn't let the model unload between beats.
+    """
+
+    def __init__(self, model_name, keep_alive=OLLAMA_KEEP_ALIVE,
+                 interval=KEEP_ALIVE_HEARTBEAT_SECONDS):
+        self.model_name = model_name
+        self.keep_alive = keep_alive
+        self.interval = interval
+        keep_alive_seconds = parse_duration(keep_alive)
+        if interval > 0 and keep_alive_seconds and 0 < keep_alive_seconds / 2 < interval:
+            self.interval = max(keep_alive_seconds / 2, 1)
+            print(f"Keep-alive {keep_alive} is shorter than the {interval}s heartbeat, "
+                  f"re-pinning {model_name} every {self.interval:g}s")
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the heartbeat thread (no-op when the interval is 0)"""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            OllamaManager.warm_model(self.model_name, self.keep_alive)
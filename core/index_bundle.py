@@ -0,0 +1,166 @@
+"""
+Portable, versioned vector store bundles for sharing indexes across nodes
+
+A bundle is a directory holding manifest.json and data.tar.gz (the FAISS
+index plus its chunk docstore). The manifest is small and checked first, so
+an incompatible bundle is rejected before the archive is read.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import threading
+from datetime import datetime, timezone
+from .index_manifest import MANIFEST_FILE, embedding_variant
+
+FORMAT_VERSION = 1
+BUNDLE_SUFFIX = ".ragbundle"
+ARCHIVE_FILE = "data.tar.gz"
+STORE_FILES = ("index.faiss", "index.pkl")
+
+# path -> (size, mtime, sha256), so unchanged documents are hashed only once
+_hash_cache = {}
+_hash_lock = threading.Lock()
+
+
+def bundle_path(bundle_dir, name):
+    """Location of the bundle for a store name"""
+    return os.path.join(bundle_dir, f"{name}{BUNDLE_SUFFIX}")
+
+
+def file_sha256(path, block_size=1 << 20):
+    """SHA-256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_files(snapshot):
+    """{relative path: sha256} for the supported files of a FolderSnapshot
+
+    Hashes are cached against each file's size and mtime from the snapshot.
+    """
+    hashes = {}
+    for entry in snapshot.text_files:
+        with _hash_lock:
+            cached = _hash_cache.get(entry.path)
+        if cached and cached[:2] == (entry.size, entry.mtime):
+            digest = cached[2]
+        else:
+            digest = file_sha256(entry.path)
+            with _hash_lock:
+                _hash_cache[entry.path] = (entry.size, entry.mtime, digest)
+        relative = os.path.relpath(entry.path, snapshot.root).replace(os.sep, "/")
+        hashes[relative] = digest
+    return hashes
+
+
+def export_bundle(store_path, bundle_dir, name, manifest):
+    """Write store_path as a bundle into bundle_dir
+
+    manifest must describe how the store was built (embedding_model,
+    chunk_size, chunk_overlap, files); format version and checksum are added
+    here. The bundle is assembled next to its final location and swapped in
+    so readers never see a half-written bundle.
+    """
+    target = bundle_path(bundle_dir, name)
+    staging = f"{target}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    archive = os.path.join(staging, ARCHIVE_FILE)
+    with tarfile.open(archive, "w:gz") as tar:
+        for file_name in STORE_FILES:
+            tar.add(os.path.join(store_path, file_name), arcname=file_name)
+
+    manifest = dict(manifest)
+    manifest.update({
+        "format_version": FORMAT_VERSION,
+        "name": name,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "archive": ARCHIVE_FILE,
+        "checksum": file_sha256(archive)
+    })
+    with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(staging, target)
+    return target
+
+
+def read_bundle_manifest(bundle):
+    """Read a bundle's manifest, or None if it is missing or unreadable"""
+    try:
+        with open(os.path.join(bundle, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def check_bundle(manifest, embedding_model, embedding_backend, embedding_quantized,
+                 embedding_normalized, chunk_size, chunk_overlap):
+    """Return why a bundle's build settings don't match here, or None if they do
+
+    Only reads the manifest; the document hashes are compared separately.
+    """
+    if manifest is None:
+        return "missing or unreadable manifest"
+    if manifest.get("format_version") != FORMAT_VERSION:
+        return f"format version {manifest.get('format_version')} (expected {FORMAT_VERSION})"
+    if manifest.get("embedding_model") != embedding_model:
+        return f"embedding model {manifest.get('embedding_model')} (expected {embedding_model})"
+    expected = (embedding_backend, embedding_quantized, embedding_normalized)
+    if embedding_variant(manifest) != expected:
+        return ("embedding backend {} (quantized={}, normalized={}), expected "
+                "{} (quantized={}, normalized={})".format(*embedding_variant(manifest), *expected))
+    if (manifest.get("chunk_size"), manifest.get("chunk_overlap")) != (chunk_size, chunk_overlap):
+        return (f"chunking {manifest.get('chunk_size')}/{manifest.get('chunk_overlap')} "
+                f"(expected {chunk_size}/{chunk_overlap})")
+    return None
+
+
+def import_bundle(bundle, store_path, embedding_model, embedding_backend, embedding_quantized,
+                  embedding_normalized, chunk_size, chunk_overlap, snapshot):
+    """Unpack a compatible bundle into store_path
+
+    The documents in snapshot are hashed only after the manifest's build
+    settings have matched, then compared with the bundle's. The files are extracted next to store_path and swapped in, so a failed
+    import never leaves a half-written store behind. Returns the bundle
+    manifest, or None if the bundle was rejected; extraction errors are
+    raised.
+    """
+    manifest = read_bundle_manifest(bundle)
+    reason = check_bundle(manifest, embedding_model, embedding_backend, embedding_quantized,
+                          embedding_normalized, chunk_size, chunk_overlap)
+    if reason is None and manifest.get("files") != hash_files(snapshot):
+        reason = "indexed documents differ from the local documents"
+    if reason is None:
+        archive = os.path.join(bundle, manifest.get("archive", ARCHIVE_FILE))
+        try:
+            if file_sha256(archive) != manifest.get("checksum"):
+                reason = "archive checksum mismatch"
+        except OSError as e:
+            reason = f"archive unreadable ({e})"
+    if reason is not None:
+        print(f"Rejected index bundle {bundle}: {reason}")
+        return None
+
+    staging = f"{store_path}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    try:
+        os.makedirs(staging)
+        with tarfile.open(archive, "r:gz") as tar:
+            for file_name in STORE_FILES:
+                member = tar.getmember(file_name)
+                with tar.extractfile(member) as src, open(os.path.join(staging, file_name), "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+        shutil.rmtree(store_path, ignore_errors=True)
+        os.replace(staging, store_path)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
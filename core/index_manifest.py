@@ -0,0 +1,53 @@
+"""
+Vector store manifest recording how an index was built
+"""
+import json
+import os
+
+MANIFEST_FILE = "manifest.json"
+
+# Stores written before manifests existed were always built with this model
+LEGACY_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def read_manifest(store_path):
+    """Read a store's manifest, or None if it has none"""
+    try:
+        with open(os.path.join(store_path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(store_path, manifest):
+    """Write a store's manifest"""
+    with open(os.path.join(store_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def embedding_variant(manifest):
+    """(backend, quantized, normalized) the store's vectors were computed with
+
+    Stores from before these were recorded used PyTorch, and ONNX stores
+    without the flag used the default int8 quantization. ONNX vectors were
+    always unit-length; older PyTorch ones only for models that normalize
+    themselves, such as the legacy default.
+    """
+    backend = manifest.get("embedding_backend") or "torch"
+    model = manifest.get("embedding_model", LEGACY_EMBEDDING_MODEL)
+    return (backend,
+            manifest.get("embedding_quantized", backend == "onnx"),
+            manifest.get("embedding_normalized", backend == "onnx" or model == LEGACY_EMBEDDING_MODEL))
+
+
+def check_embedding_model(store_path, embedding_model):
+    """Refuse a store whose vectors came from a different embedding model"""
+    manifest = read_manifest(store_path) or {}
+    stored_model = manifest.get("embedding_model", LEGACY_EMBEDDING_MODEL)
+    if stored_model != embedding_model:
+        raise Exception(
+            f"Vector store '{store_path}' was built with embedding model '{stored_model}' "
+            f"but '{embedding_model}' is configured. Delete the store or change "
+            f"RAG_EMBEDDING_MODEL to rebuild it."
+        )
+    return manifest
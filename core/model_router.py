@@ -0,0 +1,140 @@
+"""
+Routing questions between a fast and a strong LLM
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from .config import (ROUTING_FAST_MAX_WORDS, ROUTING_MIN_RELEVANCE, ROUTING_MIN_MARGIN,
+                     ROUTING_RERANK_MIN_SCORE, ROUTING_RERANK_MIN_MARGIN,
+                     ROUTING_CACHE_SIZE, ROUTING_LOG)
+
+# Phrases with which a model admits the context didn't give it an answer
+INSUFFICIENT_PATTERNS = re.compile(
+    r"(does not|doesn't|do not|don't) (contain|provide|mention|include|have)"
+    r"|not enough (information|context)|no (relevant )?information"
+    r"|(cannot|can't|unable to) (answer|find|determine)"
+    r"|i (do not|don't) know|not (mentioned|provided|specified) in",
+    re.IGNORECASE
+)
+MIN_CONFIDENT_WORDS = 1  # lookups often have one-word answers
+
+
+def _normalize(text):
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+class ModelRouter:
+    """Chooses the fast or strong model per question and records how it went
+
+    Signals, all cheap: question length, retrieval relevance of the best
+    chunk and its margin over the runner-up, and whether the fast model
+    already failed on this question. Relevance thresholds are looked up by
+    each chunk's score_type, since cosine similarities and cross-encoder
+    logits are on different scales. Answers are cached per question and
+    chunk set, so a repeated question skips generation entirely.
+    """
+
+    def __init__(self, fast_model, strong_model, max_fast_words=ROUTING_FAST_MAX_WORDS,
+                 cache_size=ROUTING_CACHE_SIZE, log_path=ROUTING_LOG):
+        self.fast_model = fast_model
+        self.strong_model = strong_model
+        self.max_fast_words = max_fast_words
+        # score_type -> (minimum best score, minimum margin over the runner-up)
+        self.thresholds = {
+            "cosine": (ROUTING_MIN_RELEVANCE, ROUTING_MIN_MARGIN),
+            "cross_encoder": (ROUTING_RERANK_MIN_SCORE, ROUTING_RERANK_MIN_MARGIN)
+        }
+        self.cache_size = cache_size
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._answers = OrderedDict()
+        self._escalated = OrderedDict()
+        self.decisions = deque(maxlen=200)
+        self.latency = {fast_model: [0, 0.0], strong_model: [0, 0.0]}  # model -> [count, total seconds]
+
+    def _answer_key(self, question, source_documents, max_tokens):
+        digest = hashlib.sha1()
+        for doc in source_documents:
+            digest.update(doc.page_content.encode("utf-8", errors="replace"))
+        return _normalize(question), digest.hexdigest(), max_tokens
+
+    def cached_answer(self, question, source_documents, max_tokens=None):
+        """Previously generated answer for the same question, chunks and budget, or None"""
+        key = self._answer_key(question, source_documents, max_tokens)
+        with self._lock:
+            if key in self._answers:
+                self._answers.move_to_end(key)
+                return self._answers[key]
+        return None
+
+    def cache_answer(self, question, source_documents, max_tokens, answer):
+        key = self._answer_key(question, source_documents, max_tokens)
+        with self._lock:
+            self._answers[key] = answer
+            while len(self._answers) > self.cache_size:
+                self._answers.popitem(last=False)
+
+    def choose(self, question, source_documents):
+        """Return (model, reasons); reasons lists why the strong model was chosen"""
+        reasons = []
+        if len(question.split()) > self.max_fast_words:
+            reasons.append("long question")
+        with self._lock:
+            if _normalize(question) in self._escalated:
+                reasons.append("fast model failed before")
+
+        scored = [doc for doc in source_documents
+                  if doc.metadata.get("score_type") in self.thresholds]
+        if scored:
+            min_score, min_margin = self.thresholds[scored[0].metadata["score_type"]]
+            scores = sorted((doc.metadata["relevance_score"] for doc in scored), reverse=True)
+            if scores[0] < min_score:
+                reasons.append("weak retrieval")
+            if len(scores) >= 2 and scores[0] - scores[1] < min_margin:
+                reasons.append("ambiguous retrieval")
+
+        return (self.strong_model if reasons else self.fast_model), reasons
+
+    def is_low_confidence(self, answer):
+        """Whether a fast answer should be escalated to the strong model"""
+        if len(answer.split()) < MIN_CONFIDENT_WORDS:
+            return True
+        return bool(INSUFFICIENT_PATTERNS.search(answer))
+
+    def remember_escalation(self, question):
+        """Send this question straight to the strong model next time"""
+        with self._lock:
+            self._escalated[_normalize(question)] = True
+            while len(self._escalated) > self.cache_size:
+                self._escalated.popitem(last=False)
+
+    def record(self, question, model, reasons, escalated, timings):
+        """Record a routing decision and the generation time per model used"""
+        decision = {
+            "time": time.time(),
+            "question": question,
+            "model": model,
+            "reasons": reasons,
+            "escalated": escalated,
+            "latency": timings
+        }
+        with self._lock:
+            for used_model, seconds in timings.items():
+                stats = self.latency.setdefault(used_model, [0, 0.0])
+                stats[0] += 1
+                stats[1] += seconds
+            self.decisions.append(decision)
+            if self.log_path:
+                try:
+                    with open(self.log_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(decision) + "\n")
+                except OSError as e:
+                    print(f"Error writing routing log: {e}")
+
+    def average_latency(self):
+        """{model: mean generation seconds} for models used so far"""
+        with self._lock:
+            return {model: total / count for model, (count, total) in self.latency.items() if count}
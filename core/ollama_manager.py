@@ -1,7 +1,10 @@
 """
 Ollama model management
 """
+import json
 import subprocess
+import urllib.request
+from .config import OLLAMA_HOST, OLLAMA_KEEP_ALIVE
 
 class OllamaManager:
     """Manager for Ollama operations"""
@@ -49,3 +52,18 @@ class OllamaManager:
         """Check if specific model is available"""
         available_models = OllamaManager.get_available_models()
         return any(model_name in model for model in available_models)
+    
+    @staticmethod
+    def warm_model(model_name, keep_alive=OLLAMA_KEEP_ALIVE):
+        """Load a model into memory (or extend its keep-alive) without generating"""
+        request = urllib.request.Request(
+            f"{OLLAMA_HOST.rstrip('/')}/api/generate",
+            data=json.dumps({"model": model_name, "keep_alive": keep_alive}).encode("utf-8"),
+            headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=300) as response:
+                return response.status == 200
+        except Exception as e:
+            print(f"Error warming model {model_name}: {e}")
+            return False
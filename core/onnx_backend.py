@@ -0,0 +1,58 @@
+"""
+ONNX Runtime model loading with optional int8 dynamic quantization
+"""
+import os
+from .config import MODEL_CACHE_DIR
+
+QUANTIZED_FILE_NAME = "model_quantized.onnx"
+
+
+def _export_dir(model_name, suffix):
+    """Local directory holding the exported ONNX model"""
+    safe_name = model_name.replace("/", "__")
+    return os.path.join(MODEL_CACHE_DIR, f"{safe_name}-{suffix}")
+
+
+def _session_options(num_threads):
+    """Build ONNX Runtime session options with thread-count control"""
+    import onnxruntime
+    options = onnxruntime.SessionOptions()
+    if num_threads and num_threads > 0:
+        options.intra_op_num_threads = num_threads
+        options.inter_op_num_threads = 1
+    return options
+
+
+def load_onnx_model(model_class, model_name, suffix, quantize=True, num_threads=0):
+    """Export a HuggingFace model to ONNX once and load it for CPU inference
+
+    model_class is an optimum ORTModel class (e.g. ORTModelForFeatureExtraction).
+    Exports and quantized weights are cached under MODEL_CACHE_DIR so only
+    the first start pays the conversion cost.
+    """
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    export_dir = _export_dir(model_name, suffix)
+    if not os.path.exists(os.path.join(export_dir, "model.onnx")):
+        model = model_class.from_pretrained(model_name, export=True)
+        model.save_pretrained(export_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(export_dir)
+
+    file_name = "model.onnx"
+    if quantize:
+        if not os.path.exists(os.path.join(export_dir, QUANTIZED_FILE_NAME)):
+            quantizer = ORTQuantizer.from_pretrained(export_dir, file_name="model.onnx")
+            qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+            quantizer.quantize(save_dir=export_dir, quantization_config=qconfig)
+        file_name = QUANTIZED_FILE_NAME
+
+    model = model_class.from_pretrained(
+        export_dir,
+        file_name=file_name,
+        provider="CPUExecutionProvider",
+        session_options=_session_options(num_threads)
+    )
+    tokenizer = AutoTokenizer.from_pretrained(export_dir)
+    return model, tokenizer
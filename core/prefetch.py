@@ -0,0 +1,120 @@
+"""
+Speculative retrieval while the user is still typing
+"""
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .ollama_manager import OllamaManager
+from .conversation import STOP_WORDS
+from .config import PREFETCH_MIN_CHARS
+
+WARM_INTERVAL_SECONDS = 60
+
+
+def normalize_question(text):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+def content_words(key):
+    """Words of a normalized question that carry its topic"""
+    return [word for word in key.split() if word not in STOP_WORDS]
+
+
+class RetrievalPrefetcher:
+    """Retrieves chunks for a partial question on a background thread
+
+    Only the latest request matters: older ones are skipped before they start
+    and their results are discarded. When the submitted question differs
+    from the prefetched text only in punctuation, whitespace or stop-words
+    its chunks are reused, so answering goes straight to generation.
+    """
+
+    def __init__(self, assistant, model_names=()):
+        self.assistant = assistant
+        self.model_names = list(model_names)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._text = None
+        self._future = None
+        self._last_warm = 0.0
+
+    def request(self, text):
+        """Start prefetching for text, superseding any earlier request"""
+        key = normalize_question(text)
+        with self._lock:
+            if len(key) < PREFETCH_MIN_CHARS or key == self._text:
+                return
+            self._generation += 1
+            self._text = key
+            self._future = self._executor.submit(self._prefetch, self._generation, text)
+        self._warm_models()
+
+    def invalidate(self):
+        """Drop any prefetched result (e.g. after conversation history changed)"""
+        with self._lock:
+            self._generation += 1
+            self._text = None
+            self._future = None
+
+    def take(self, text):
+        """Return prefetched chunks for text, or None if the prefetch doesn't match
+
+        Waits for an in-flight prefetch of the same question rather than
+        retrieving twice.
+        """
+        key = normalize_question(text)
+        with self._lock:
+            future, prefetched = self._future, self._text
+            self._text = None
+            self._future = None
+            if future is None or not self._matches(key, prefetched):
+                self._generation += 1
+                return None
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Prefetch failed: {e}")
+            return None
+
+    def _matches(self, key, prefetched):
+        """Same question up to punctuation, whitespace and stop-words
+
+        A character-level similarity would treat "capital of Iran" and
+        "capital of Iraq" as the same question, so content words must match
+        exactly.
+        """
+        if prefetched is None:
+            return False
+        if key == prefetched:
+            return True
+        return content_words(key) == content_words(prefetched)
+
+    def _is_current(self, generation):
+        with self._lock:
+            return generation == self._generation
+
+    def _prefetch(self, generation, text):
+        """Embed and search for text"""
+        if not self._is_current(generation):
+            return None
+        return self.assistant.retrieve(text)
+
+    def _warm_models(self):
+        """Ask Ollama to keep the models loaded, at most once per interval
+
+        Runs on its own thread: a model load can take minutes and must not
+        hold up the retrieval worker or a submitted question waiting on it.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not self.model_names or now - self._last_warm < WARM_INTERVAL_SECONDS:
+                return
+            self._last_warm = now
+        threading.Thread(target=self._warm_models_now, daemon=True).start()
+
+    def _warm_models_now(self):
+        for model_name in self.model_names:
+            OllamaManager.warm_model(model_name)
@@ -2,84 +2,232 @@
 RAG pipeline creation and management
 """
 import os
+import shutil
+import time
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.schema import Document
+from langchain.schema.vectorstore import VectorStoreRetriever
+from .embeddings import get_embeddings
+from .generation import GenerationProfile, KeepAliveHeartbeat
+from .model_router import ModelRouter
+from .index_manifest import check_embedding_model, embedding_variant, write_manifest
+from .index_bundle import bundle_path, export_bundle, hash_files, import_bundle
+from .config import (EMBEDDING_MODEL, EMBEDDING_QUANTIZE, CHUNK_SIZE, CHUNK_OVERLAP,
+                     VECTOR_STORE_DIR, INDEX_BUNDLE_DIR, INDEX_BUNDLE_PUBLISH, RETRIEVAL_K,
+                     RERANK_ENABLED, RERANK_FETCH_K, RERANK_TOP_N, OLLAMA_HOST,
+                     ROUTING_FAST_MODEL)
 
 class RAGPipeline:
-    def __init__(self):
+    def __init__(self, rerank=RERANK_ENABLED, embedding_model=EMBEDDING_MODEL):
+        self.embedding_model = embedding_model
         self.embeddings = self._get_embeddings()
+        self.reranker = self._get_reranker() if rerank else None
         
     def _get_embeddings(self):
-        """Get embeddings with fallback support"""
+        """Get embeddings for the configured model and backend"""
+        embeddings, self.embedding_backend = get_embeddings(self.embedding_model)
+        self.embedding_quantized = self.embedding_backend == "onnx" and EMBEDDING_QUANTIZE
+        self.embedding_normalized = True  # both backends return unit-length vectors
+        return embeddings
+    
+    def _get_reranker(self):
+        """Get cross-encoder re-ranker, or None if it cannot be loaded"""
         try:
-            from langchain_huggingface import HuggingFaceEmbeddings
-            return HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        except ImportError:
-            from langchain_community.embeddings import HuggingFaceEmbeddings
-            return HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+            from .reranker import CrossEncoderReranker
+            return CrossEncoderReranker()
+        except Exception as e:
+            print(f"Re-ranking disabled: {e}")
+            return None
+    
+    def _get_retriever(self, vector_store):
+        """Get retriever, with a cross-encoder re-rank stage when enabled"""
+        if self.reranker is None:
+            return ScoredRetriever(vectorstore=vector_store, search_kwargs={"k": RETRIEVAL_K})
+        
+        # Cheap wide candidate set, then keep only the best few chunks
+        from langchain.retrievers import ContextualCompressionRetriever
+        from .reranker import RerankCompressor
+        base_retriever = vector_store.as_retriever(
+            search_type="similarity",
+            search_kwargs={"k": max(RERANK_FETCH_K, RERANK_TOP_N)}
+        )
+        return ContextualCompressionRetriever(
+            base_compressor=RerankCompressor(reranker=self.reranker, top_n=RERANK_TOP_N),
+            base_retriever=base_retriever
+        )
     
-    def _get_llm(self, model_name):
+    def _get_llm(self, model_name, profile):
         """Get LLM with fallback support"""
         try:
             from langchain_ollama import OllamaLLM
             return OllamaLLM(
                 model=model_name,
-                temperature=0.1,
-                num_predict=512
+                base_url=OLLAMA_HOST,
+                keep_alive=profile.keep_alive,
+                **profile.options()
             )
         except ImportError:
+            # No keep_alive field here; the heartbeat keeps the model loaded
             from langchain_community.llms import Ollama
             return Ollama(
                 model=model_name,
-                temperature=0.1,
-                num_predict=512
+                base_url=OLLAMA_HOST,
+                **profile.options()
             )
     
-    def create_pipeline(self, documents, model_name, folder_path):
-        """Create complete RAG pipeline"""
+    def _split_documents(self, documents):
+        """Split documents into overlapping chunks"""
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        return text_splitter.split_documents(documents)
+    
+    def _store_manifest(self, file_stats):
+        """Describe how a vector store is built with the current settings"""
+        manifest = {
+            "embedding_model": self.embedding_model,
+            "embedding_backend": self.embedding_backend,
+            "embedding_quantized": self.embedding_quantized,
+            "embedding_normalized": self.embedding_normalized,
+            "chunk_size": CHUNK_SIZE,
+            "chunk_overlap": CHUNK_OVERLAP
+        }
+        if file_stats is not None:
+            manifest["files"] = file_stats
+        return manifest
+    
+    def _build_vector_store(self, documents, vector_store_path, file_stats):
+        """Embed all documents into a new vector store"""
+        chunks = self._split_documents(documents)
+        vector_store = FAISS.from_documents(chunks, self.embeddings)
+        vector_store.save_local(vector_store_path)
+        write_manifest(vector_store_path, self._store_manifest(file_stats))
+        return vector_store
+    
+    def _load_vector_store(self, documents, vector_store_path, file_stats):
+        """Load an existing store, embedding only files added since it was built
+        
+        Changed or removed files, or different chunking settings, trigger a
+        full rebuild since FAISS chunks cannot be replaced per file.
+        Returns (vector_store, updated).
+        """
+        manifest = check_embedding_model(vector_store_path, self.embedding_model)
+        if embedding_variant(manifest) != (self.embedding_backend, self.embedding_quantized,
+                                           self.embedding_normalized):
+            # Vectors from another backend, precision or scaling don't match this one's queries
+            print("Embedding backend, quantization or normalization changed since the vector store was built, rebuilding")
+            return self._build_vector_store(documents, vector_store_path, file_stats), True
+        if (manifest.get("chunk_size", CHUNK_SIZE), manifest.get("chunk_overlap", CHUNK_OVERLAP)) != (CHUNK_SIZE, CHUNK_OVERLAP):
+            print("Chunking settings changed since the vector store was built, rebuilding")
+            return self._build_vector_store(documents, vector_store_path, file_stats), True
+        
+        indexed_files = manifest.get("files")
+        if file_stats is not None and indexed_files is not None:
+            if any(file_stats.get(path) != stat for path, stat in indexed_files.items()):
+                print("Documents changed since the vector store was built, rebuilding")
+                return self._build_vector_store(documents, vector_store_path, file_stats), True
+        
+        vector_store = FAISS.load_local(vector_store_path, self.embeddings, allow_dangerous_deserialization=True)
+        if file_stats is None or indexed_files is None:
+            return vector_store, False
+        
+        added_files = set(file_stats) - set(indexed_files)
+        if not added_files:
+            return vector_store, False
+        
+        new_documents = [doc for doc in documents if doc.metadata.get("source") in added_files]
+        if new_documents:
+            vector_store.add_documents(self._split_documents(new_documents))
+            vector_store.save_local(vector_store_path)
+        write_manifest(vector_store_path, {**manifest, "files": file_stats})
+        return vector_store, True
+    
+    def _import_bundle(self, store_name, vector_store_path, snapshot):
+        """Unpack a prebuilt bundle from the shared directory instead of embedding
+        
+        Any failure removes what was unpacked, so the store is built locally.
+        """
+        bundle = bundle_path(INDEX_BUNDLE_DIR, store_name)
+        if not os.path.isdir(bundle):
+            return False
+        try:
+            manifest = import_bundle(bundle, vector_store_path, self.embedding_model,
+                                     self.embedding_backend, self.embedding_quantized,
+                                     self.embedding_normalized, CHUNK_SIZE, CHUNK_OVERLAP, snapshot)
+            if manifest is None:
+                return False
+            write_manifest(vector_store_path, self._store_manifest(snapshot.file_stats()))
+            return True
+        except Exception as e:
+            print(f"Error importing index bundle {bundle}, building locally: {e}")
+            shutil.rmtree(vector_store_path, ignore_errors=True)
+            return False
+    
+    def _publish_bundle(self, store_name, vector_store_path, vector_store, snapshot):
+        """Export the store to the shared directory for other nodes"""
+        try:
+            manifest = self._store_manifest(hash_files(snapshot))
+            manifest["embedding_dim"] = vector_store.index.d
+            os.makedirs(INDEX_BUNDLE_DIR, exist_ok=True)
+            export_bundle(vector_store_path, INDEX_BUNDLE_DIR, store_name, manifest)
+        except Exception as e:
+            print(f"Error publishing index bundle: {e}")
+    
+    def create_pipeline(self, documents, model_name, folder_path, snapshot=None,
+                        fast_model=ROUTING_FAST_MODEL):
+        """Create complete RAG pipeline
+        
+        snapshot is the FolderSnapshot the documents were loaded from; its file
+        stats let an existing vector store be updated incrementally, and its
+        file hashes are matched against shared index bundles.
+        
+        When fast_model is given, simple questions go to it and model_name is
+        kept for harder ones and escalations.
+        """
         # Create unique vector store name
         folder_name = os.path.basename(folder_path)
-        vector_store_path = f"vector_store_{folder_name.replace(' ', '_')}"
+        store_name = f"vector_store_{folder_name.replace(' ', '_')}"
+        vector_store_path = os.path.join(VECTOR_STORE_DIR, store_name)
+        file_stats = snapshot.file_stats() if snapshot is not None else None
+        
+        # Prefer a prebuilt bundle over embedding locally
+        if not os.path.exists(vector_store_path) and INDEX_BUNDLE_DIR and snapshot is not None:
+            self._import_bundle(store_name, vector_store_path, snapshot)
         
         # Load or create vector store
         if os.path.exists(vector_store_path):
-            vector_store = FAISS.load_local(vector_store_path, self.embeddings, allow_dangerous_deserialization=True)
+            vector_store, updated = self._load_vector_store(documents, vector_store_path, file_stats)
         else:
-            # Split documents
-            text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-            chunks = text_splitter.split_documents(documents)
-            
-            # Create vector store
-            vector_store = FAISS.from_documents(chunks, self.embeddings)
-            vector_store.save_local(vector_store_path)
+            vector_store, updated = self._build_vector_store(documents, vector_store_path, file_stats), True
+        
+        if updated and INDEX_BUNDLE_PUBLISH and INDEX_BUNDLE_DIR and snapshot is not None:
+            self._publish_bundle(store_name, vector_store_path, vector_store, snapshot)
         
         # Create retriever
-        retriever = vector_store.as_retriever(
-            search_type="similarity",
-            search_kwargs={"k": 4}
-        )
+        retriever = self._get_retriever(vector_store)
         
-        # Create prompt template
-        prompt_template = """You are a helpful AI assistant. Use the following context from documents to answer the question accurately and concisely.
+        # Create prompt template. Static instructions come first and the
+        # per-question parts last, so Ollama can reuse the evaluated prefix
+        # (and, in a conversation, the unchanged history) across questions.
+        prompt_template = """You are a helpful AI assistant. Answer the question accurately and concisely using only the context from documents provided below. If the context doesn't contain relevant information, say so clearly.
 
-Context Information:
+{history}Context Information:
 {context}
 
 Question: {question}
 
-Please provide a helpful answer based only on the context provided. If the context doesn't contain relevant information, say so clearly.
-
 Answer:"""
         
         QA_PROMPT = PromptTemplate(
             template=prompt_template,
-            input_variables=["context", "question"]
+            input_variables=["context", "history", "question"]
         )
         
-        # Get LLM
-        llm = self._get_llm(model_name)
+        # Get LLM with this model's runtime options, pinned in memory
+        profile = GenerationProfile(model_name)
+        llm = self._get_llm(model_name, profile)
         
         # Create QA chain
         qa_chain = RetrievalQA.from_chain_type(
@@ -91,4 +239,160 @@ Answer:"""
             output_key="result"
         )
         
-        return qa_chain
+        assistant = RAGAssistant(qa_chain)
+        assistant.add_model(model_name, qa_chain.combine_documents_chain, profile)
+        
+        # Same prompt and retrieval for the fast model, only the LLM differs
+        if fast_model and fast_model != model_name:
+            fast_profile = GenerationProfile(fast_model)
+            combine_chain = qa_chain.combine_documents_chain
+            fast_chain = combine_chain.copy(update={
+                "llm_chain": combine_chain.llm_chain.copy(update={"llm": self._get_llm(fast_model, fast_profile)})
+            })
+            assistant.add_model(fast_model, fast_chain, fast_profile)
+            assistant.router = ModelRouter(fast_model, model_name)
+        
+        return assistant
+
+
+class RAGAssistant:
+    """Question answering over a RetrievalQA chain with retrieval exposed as its own step
+    
+    Holds one stuff chain per model. With a router, each question goes to
+    the fast or strong model; otherwise the first model added answers.
+    """
+    
+    def __init__(self, qa_chain, router=None):
+        self.qa_chain = qa_chain
+        self.router = router
+        self.model_name = None
+        self._models = {}
+        self._heartbeats = []
+        
+    def add_model(self, model_name, combine_chain, profile):
+        """Register a model's stuff chain and keep the model loaded"""
+        if self.model_name is None:
+            self.model_name = model_name
+        self._models[model_name] = (combine_chain, profile)
+        heartbeat = KeepAliveHeartbeat(model_name, profile.keep_alive)
+        heartbeat.start()
+        self._heartbeats.append(heartbeat)
+        
+    @property
+    def model_names(self):
+        return list(self._models)
+        
+    def close(self):
+        """Stop keeping the models loaded"""
+        for heartbeat in self._heartbeats:
+            heartbeat.stop()
+        
+    def retrieve(self, query):
+        """Retrieve source chunks for a query"""
+        return self.qa_chain.retriever.get_relevant_documents(query)
+    
+    def invoke(self, inputs):
+        """Answer inputs["query"]
+        
+        Optional inputs:
+            retrieval_query: text used for retrieval instead of the question
+            history: conversation history to include in the prompt
+            source_documents: already retrieved chunks, skipping retrieval
+            on_token: callable receiving answer tokens as they are generated
+            on_restart: called when streamed tokens are discarded because the
+                question is escalated to the strong model
+            max_tokens: answer-length budget for this question
+            model: answer with this model directly, bypassing routing, the
+                answer cache and the routing log
+        
+        The result includes "model", the model that produced the answer
+        ("cache" when a routed answer was reused).
+        """
+        question = inputs["query"]
+        source_documents = inputs.get("source_documents")
+        if source_documents is None:
+            source_documents = self.retrieve(inputs.get("retrieval_query") or question)
+        
+        def result(answer, model):
+            return {"query": question, "result": answer,
+                    "source_documents": source_documents, "model": model}
+        
+        if self.router is None or inputs.get("model"):
+            model = inputs.get("model") or self.model_name
+            return result(self._generate(model, question, source_documents, inputs), model)
+        
+        # Cached answers are only valid without conversation history
+        history = inputs.get("history")
+        max_tokens = inputs.get("max_tokens")
+        if not history:
+            cached = self.router.cached_answer(question, source_documents, max_tokens)
+            if cached is not None:
+                return result(cached, "cache")
+        
+        model, reasons = self.router.choose(question, source_documents)
+        timings = {}
+        start = time.perf_counter()
+        answer = self._generate(model, question, source_documents, inputs)
+        timings[model] = time.perf_counter() - start
+        
+        escalated = model == self.router.fast_model and self.router.is_low_confidence(answer)
+        if escalated:
+            self.router.remember_escalation(question)
+            if inputs.get("on_restart"):
+                inputs["on_restart"]()
+            model = self.router.strong_model
+            start = time.perf_counter()
+            answer = self._generate(model, question, source_documents, inputs)
+            timings[model] = time.perf_counter() - start
+        
+        self.router.record(question, model, reasons, escalated, timings)
+        if not history:
+            self.router.cache_answer(question, source_documents, max_tokens, answer)
+        return result(answer, model)
+    
+    def _generate(self, model_name, question, source_documents, inputs):
+        """Run one model's stuff chain over the retrieved chunks"""
+        combine_chain, profile = self._models[model_name]
+        max_tokens = inputs.get("max_tokens")
+        if max_tokens:
+            # Cap num_predict for this call only
+            llm_chain = combine_chain.llm_chain.copy(
+                update={"llm_kwargs": {"options": profile.options(max_tokens)}}
+            )
+            combine_chain = combine_chain.copy(update={"llm_chain": llm_chain})
+        
+        history = inputs.get("history", "")
+        on_token = inputs.get("on_token")
+        return combine_chain.run(
+            input_documents=source_documents,
+            question=question,
+            history=f"Conversation so far:\n{history}\n\n" if history else "",
+            callbacks=[TokenCallbackHandler(on_token)] if on_token else None
+        )
+
+
+class ScoredRetriever(VectorStoreRetriever):
+    """Similarity retriever that keeps each chunk's cosine similarity in its metadata
+    
+    Both embedding backends produce unit-length vectors, so the squared L2
+    distance FAISS returns converts exactly: cosine = 1 - distance / 2.
+    """
+    
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        pairs = self.vectorstore.similarity_search_with_score(query, **self.search_kwargs)
+        return [
+            Document(page_content=doc.page_content,
+                     metadata={**doc.metadata, "relevance_score": 1 - float(distance) / 2,
+                               "score_type": "cosine"})
+            for doc, distance in pairs
+        ]
+
+
+class TokenCallbackHandler(BaseCallbackHandler):
+    """Forwards streamed LLM tokens to a plain callable"""
+    
+    def __init__(self, on_token):
+        self.on_token = on_token
+        
+    def on_llm_new_token(self, token, **kwargs):
+        self.on_token(token)
@@ -0,0 +1,120 @@
+"""
+Cross-encoder re-ranking of retrieved chunks
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Sequence
+from langchain.retrievers.document_compressors.base import BaseDocumentCompressor
+from langchain.schema import Document
+from .config import (RERANK_MODEL, RERANK_BACKEND, RERANK_QUANTIZE,
+                     RERANK_BATCH_SIZE, RERANK_CACHE_SIZE, CPU_THREADS)
+
+
+class CrossEncoderReranker:
+    """Scores (query, chunk) pairs with a small cross-encoder on CPU"""
+
+    def __init__(self, model_name=RERANK_MODEL, backend=RERANK_BACKEND,
+                 quantize=RERANK_QUANTIZE, batch_size=RERANK_BATCH_SIZE,
+                 cache_size=RERANK_CACHE_SIZE):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.backend = backend
+        self._scorer = self._load_scorer(backend, quantize)
+
+    def _load_scorer(self, backend, quantize):
+        """Load the scoring backend, falling back to PyTorch"""
+        if backend == "onnx":
+            try:
+                return self._load_onnx_scorer(quantize)
+            except ImportError as e:
+                print(f"ONNX Runtime not available for re-ranking ({e}), using PyTorch")
+                self.backend = "torch"
+        return self._load_torch_scorer()
+
+    def _load_torch_scorer(self):
+        """Cross-encoder through sentence-transformers"""
+        from sentence_transformers import CrossEncoder
+        model = CrossEncoder(self.model_name, device="cpu")
+
+        def score(pairs):
+            return [float(s) for s in model.predict(pairs, batch_size=self.batch_size,
+                                                    show_progress_bar=False)]
+        return score
+
+    def _load_onnx_scorer(self, quantize):
+        """Cross-encoder exported to ONNX, optionally int8 quantized"""
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+        from .onnx_backend import load_onnx_model
+        model, tokenizer = load_onnx_model(
+            ORTModelForSequenceClassification, self.model_name, "rerank",
+            quantize=quantize, num_threads=CPU_THREADS
+        )
+
+        def score(pairs):
+            inputs = tokenizer([q for q, _ in pairs], [p for _, p in pairs],
+                               padding=True, truncation=True, return_tensors="np")
+            logits = model(**inputs).logits
+            return [float(row[0]) for row in logits]
+        return score
+
+    @staticmethod
+    def _cache_key(query, text):
+        return query, hashlib.sha1(text.encode("utf-8", errors="replace")).hexdigest()
+
+    def score(self, query, texts):
+        """Return one relevance score per text, scoring only uncached pairs"""
+        keys = [self._cache_key(query, text) for text in texts]
+        scores = {}
+        with self._lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[key] = self._cache[key]
+
+        missing = [(key, text) for key, text in zip(keys, texts) if key not in scores]
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            batch_scores = self._scorer([(query, text) for _, text in batch])
+            with self._lock:
+                for (key, _), value in zip(batch, batch_scores):
+                    scores[key] = value
+                    self._cache[key] = value
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return [scores[key] for key in keys]
+
+    def rerank(self, query, documents, top_n):
+        """Return the top_n documents ordered by cross-encoder score
+
+        The raw cross-encoder logit is stored in metadata as relevance_score,
+        with score_type "cross_encoder".
+        """
+        if not documents:
+            return []
+        scores = self.score(query, [doc.page_content for doc in documents])
+        ranked = sorted(zip(documents, scores), key=lambda pair: pair[1], reverse=True)
+        return [
+            Document(page_content=doc.page_content,
+                     metadata={**doc.metadata, "relevance_score": score,
+                               "score_type": "cross_encoder"})
+            for doc, score in ranked[:top_n]
+        ]
+
+
+class RerankCompressor(BaseDocumentCompressor):
+    """Adapter so the re-ranker can sit inside a ContextualCompressionRetriever"""
+
+    reranker: Any
+    top_n: int = 3
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def compress_documents(self, documents: Sequence[Document], query: str,
+                           callbacks: Optional[Any] = None) -> Sequence[Document]:
+        return self.reranker.rerank(query, list(documents), self.top_n)
@@ -46,6 +46,8 @@ class RAGApplication:
     def change_documents(self):
         """Return to setup screen to change documents"""
         self.is_initialized = False
+        if self.assistant is not None:
+            self.assistant.close()
         self.assistant = None
         self.chat_frame.pack_forget()
         self.setup_frame.pack(fill=tk.BOTH, expand=True)
@@ -2,13 +2,34 @@
 Chat interface for asking questions
 """
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
+from tkinter import ttk, scrolledtext, messagebox, filedialog
+import os
 import threading
+from collections import deque
+from core.config import CONVERSATION_ENABLED, CONVERSATION_DIR, PREFETCH_ENABLED, PREFETCH_DEBOUNCE_MS
+from core.conversation import ConversationSession, ConversationalAssistant
+from core.prefetch import RetrievalPrefetcher
+
+SCROLLBACK_LINES = 2000  # older messages are trimmed beyond this many lines
+STREAM_FLUSH_MS = 50     # streamed tokens are batched into one insert per interval
 
 class ChatFrame(ttk.LabelFrame):
     def __init__(self, parent, app_controller):
         super().__init__(parent, text="Step 2: Ask Questions", padding="15")
         self.app_controller = app_controller
+        self.conversation = None
+        self.prefetcher = None
+        self._prefetch_after_id = None
+        
+        # Rendering state: message start marks and the streamed-token buffer
+        self._message_marks = deque()
+        self._mark_counter = 0
+        self._tokens_lock = threading.Lock()
+        self._pending_tokens = []
+        self._preview_discarded = False
+        self._flush_scheduled = False
+        self._answer_id = 0
+        self._answer_active = False
         self.setup_ui()
         
     def setup_ui(self):
@@ -56,6 +77,7 @@ class ChatFrame(ttk.LabelFrame):
                                        width=70, font=('Arial', 10))
         self.question_entry.pack(fill=tk.X, pady=5)
         self.question_entry.bind('<Return>', self.on_enter_pressed)
+        self.question_var.trace_add("write", self._on_question_edited)
         
         # Buttons frame
         btn_frame = ttk.Frame(input_frame)
@@ -66,6 +88,7 @@ class ChatFrame(ttk.LabelFrame):
         self.ask_btn.pack(side=tk.LEFT, padx=(0, 10))
         
         ttk.Button(btn_frame, text="Clear Chat", command=self.clear_chat).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(btn_frame, text="Open Chat", command=self.open_chat).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(btn_frame, text="Change Documents", 
                   command=self.app_controller.change_documents).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(btn_frame, text="Exit", command=self.app_controller.root.quit).pack(side=tk.LEFT)
@@ -89,10 +112,26 @@ class ChatFrame(ttk.LabelFrame):
     def on_system_ready(self, folder_info):
         """Called when system is ready for questions"""
         self.doc_info_var.set(folder_info)
+        self.start_conversation()
         self.ask_btn.config(state=tk.NORMAL)
         self.question_entry.focus()
         self.add_message("system", "RAG system ready! Ask me anything about your documents!")
         
+    def start_conversation(self, session=None):
+        """Start a chat session with its own persisted history (a new one by default)"""
+        self.conversation = None
+        if CONVERSATION_ENABLED and self.app_controller.assistant is not None:
+            self.conversation = ConversationalAssistant(self.app_controller.assistant,
+                                                        session or ConversationSession())
+        
+        # Prefetch through the same assistant so follow-ups are condensed first
+        self.prefetcher = None
+        if PREFETCH_ENABLED and self.app_controller.assistant is not None:
+            self.prefetcher = RetrievalPrefetcher(
+                self.conversation or self.app_controller.assistant,
+                getattr(self.app_controller.assistant, "model_names", ())
+            )
+        
     def on_enter_pressed(self, event):
         """Handle Enter key press"""
         self.ask_question()
@@ -106,10 +145,33 @@ class ChatFrame(ttk.LabelFrame):
         
         self.question_var.set(question)
         self.question_entry.focus()
+        self._cancel_prefetch_timer()
+        self._start_prefetch()
+        
+    def _on_question_edited(self, *args):
+        """Debounce edits to the question and prefetch once typing pauses"""
+        if self.prefetcher is None or not self.app_controller.is_initialized:
+            return
+        self._cancel_prefetch_timer()
+        self._prefetch_after_id = self.after(PREFETCH_DEBOUNCE_MS, self._start_prefetch)
+        
+    def _cancel_prefetch_timer(self):
+        """Cancel a pending debounced prefetch"""
+        if self._prefetch_after_id is not None:
+            self.after_cancel(self._prefetch_after_id)
+            self._prefetch_after_id = None
+        
+    def _start_prefetch(self):
+        """Start retrieval for the current partial question in the background"""
+        self._prefetch_after_id = None
+        text = self.question_var.get().strip()
+        if self.prefetcher is not None and text:
+            self.prefetcher.request(text)
         
     def add_message(self, sender, message):
         """Add a message to the chat display"""
         self.chat_display.config(state=tk.NORMAL)
+        self._mark_message_start()
         
         if sender == "user":
             self.chat_display.insert(tk.END, "You: ", "user")
@@ -120,15 +182,79 @@ class ChatFrame(ttk.LabelFrame):
         elif sender == "system":
             self.chat_display.insert(tk.END, f"{message}\n\n", "system")
         
+        self._trim_scrollback()
         self.chat_display.see(tk.END)
         self.chat_display.config(state=tk.DISABLED)
         
+    def _mark_message_start(self):
+        """Set a mark where the next message starts, used for trimming"""
+        self._mark_counter += 1
+        mark = f"msg{self._mark_counter}"
+        self.chat_display.mark_set(mark, "end-1c")
+        self.chat_display.mark_gravity(mark, tk.LEFT)
+        self._message_marks.append(mark)
+        
+    def _trim_scrollback(self):
+        """Drop whole messages from the top once the display exceeds the scrollback limit"""
+        line_count = int(self.chat_display.index("end-1c").split(".")[0])
+        excess = line_count - SCROLLBACK_LINES
+        if excess <= 0:
+            return
+        
+        while len(self._message_marks) > 1:
+            self.chat_display.mark_unset(self._message_marks.popleft())
+            first_line = int(self.chat_display.index(self._message_marks[0]).split(".")[0])
+            if first_line > excess:
+                break
+        self.chat_display.delete("1.0", self._message_marks[0])
+        
     def clear_chat(self):
         """Clear the chat display"""
+        self._clear_display()
+        self.start_conversation()
+        self.add_message("system", "Chat cleared. Ready for new questions.")
+        
+    def open_chat(self):
+        """Reopen a saved chat session and continue it"""
+        if not self.app_controller.is_initialized:
+            messagebox.showwarning("Not Ready", "Please initialize the RAG system first.")
+            return
+        if not CONVERSATION_ENABLED:
+            messagebox.showinfo("Conversation Off", "Conversation memory is disabled (RAG_CONVERSATION=0).")
+            return
+        
+        path = filedialog.askopenfilename(
+            title="Open a saved chat",
+            initialdir=CONVERSATION_DIR if os.path.isdir(CONVERSATION_DIR) else None,
+            filetypes=[("Saved chats", "*.json")]
+        )
+        if not path:
+            return
+        
+        session_id = os.path.splitext(os.path.basename(path))[0]
+        session = ConversationSession.load(session_id, storage_dir=os.path.dirname(path))
+        self._clear_display()
+        self.start_conversation(session)
+        if session.summary:
+            self.add_message("system", f"Earlier in this chat: {session.summary}")
+        for turn in session.turns:
+            self.add_message("user", turn["question"])
+            self.add_message("assistant", turn["answer"])
+        self.add_message("system", f"Reopened chat {session_id}. Ask a follow-up question.")
+        
+    def _clear_display(self):
+        """Empty the chat display and drop any answer still streaming"""
+        with self._tokens_lock:
+            self._answer_id += 1
+            self._pending_tokens = []
+            self._preview_discarded = False
+        self._answer_active = False
+        
         self.chat_display.config(state=tk.NORMAL)
         self.chat_display.delete(1.0, tk.END)
+        while self._message_marks:
+            self.chat_display.mark_unset(self._message_marks.popleft())
         self.chat_display.config(state=tk.DISABLED)
-        self.add_message("system", "Chat cleared. Ready for new questions.")
         
     def ask_question(self):
         """Ask question to the RAG system"""
@@ -143,25 +269,40 @@ class ChatFrame(ttk.LabelFrame):
         
         # Clear input and disable button
         self.question_var.set("")
+        self._cancel_prefetch_timer()
         self.ask_btn.config(state=tk.DISABLED)
         self.question_entry.config(state=tk.DISABLED)
         
-        # Add user question
+        # Add user question and a placeholder the answer will replace in place
         self.add_message("user", question)
-        self.add_message("system", "Thinking...")
+        answer_id = self._begin_answer()
         
         # Process in background
-        threading.Thread(target=self._process_question, args=(question,), daemon=True).start()
+        threading.Thread(target=self._process_question, args=(question, answer_id), daemon=True).start()
         
-    def _process_question(self, question):
+    def _process_question(self, question, answer_id):
         """Process question in background"""
         try:
-            result = self.app_controller.assistant.invoke({"query": question})
+            assistant = self.conversation or self.app_controller.assistant
+            inputs = {
+                "query": question,
+                "on_token": lambda token: self._queue_token(answer_id, token),
+                "on_restart": lambda: self._restart_answer(answer_id)
+            }
+            
+            # Reuse chunks retrieved while the question was being typed
+            if self.prefetcher is not None:
+                source_documents = self.prefetcher.take(question)
+                if source_documents is not None:
+                    inputs["source_documents"] = source_documents
+            
+            result = assistant.invoke(inputs)
             answer = result["result"]
             sources = result.get("source_documents", [])
+            model = result.get("model")
             
             self.app_controller.root.after(0, 
-                lambda: self._show_response(answer, sources)
+                lambda: self._show_response(answer, sources, model)
             )
             
         except Exception as e:
@@ -170,13 +311,114 @@ class ChatFrame(ttk.LabelFrame):
                 lambda: self._show_error(error_msg)
             )
             
-    def _show_response(self, answer, source_documents):
+    def _begin_answer(self):
+        """Insert the assistant header and a "Thinking..." placeholder between answer marks"""
+        with self._tokens_lock:
+            self._answer_id += 1
+            self._pending_tokens = []
+            self._preview_discarded = False
+            answer_id = self._answer_id
+        self._answer_active = True
+        
+        self.chat_display.config(state=tk.NORMAL)
+        self._mark_message_start()
+        self.chat_display.insert(tk.END, "Assistant: ", "assistant")
+        self.chat_display.mark_set("answer_start", "end-1c")
+        self.chat_display.mark_gravity("answer_start", tk.LEFT)
+        self.chat_display.insert(tk.END, "\n\n")
+        
+        # answer_end has right gravity, so text inserted at it lands before the mark
+        self.chat_display.mark_set("answer_end", "answer_start")
+        self.chat_display.mark_gravity("answer_end", tk.RIGHT)
+        self.chat_display.insert("answer_end", "Thinking...", ("system", "placeholder"))
+        
+        self._trim_scrollback()
+        self.chat_display.see(tk.END)
+        self.chat_display.config(state=tk.DISABLED)
+        return answer_id
+        
+    def _queue_token(self, answer_id, token):
+        """Buffer a streamed token (background thread) and schedule a batched flush"""
+        with self._tokens_lock:
+            if answer_id != self._answer_id:
+                return
+            self._pending_tokens.append(token)
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self.app_controller.root.after(STREAM_FLUSH_MS, self._flush_tokens)
+        
+    def _flush_tokens(self):
+        """Append all buffered tokens at the answer mark in one insert"""
+        with self._tokens_lock:
+            text = "".join(self._pending_tokens)
+            self._pending_tokens = []
+            discarded = self._preview_discarded
+            self._preview_discarded = False
+            self._flush_scheduled = False
+        if not (text or discarded) or not self._answer_active:
+            return
+        
+        self.chat_display.config(state=tk.NORMAL)
+        if discarded:
+            # Escalated: the preview so far came from the other model
+            self.chat_display.delete("answer_start", "answer_end")
+            if not text:
+                self.chat_display.insert("answer_end", "Thinking harder...", ("system", "placeholder"))
+        placeholder = self.chat_display.tag_ranges("placeholder")
+        if text and placeholder:
+            self.chat_display.delete(placeholder[0], placeholder[-1])
+        if text:
+            self.chat_display.insert("answer_end", text)
+        self.chat_display.see(tk.END)
+        self.chat_display.config(state=tk.DISABLED)
+        
+    def _restart_answer(self, answer_id):
+        """Discard the streamed preview when the question is escalated (background thread)
+        
+        The buffer is cleared here, before the strong model starts streaming;
+        the next flush wipes the preview from the display ahead of any new
+        tokens, so none of the escalated answer is lost.
+        """
+        with self._tokens_lock:
+            if answer_id != self._answer_id:
+                return
+            self._pending_tokens = []
+            self._preview_discarded = True
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self.app_controller.root.after(0, self._flush_tokens)
+        
+    def _finish_answer(self, text, tag=None):
+        """Replace the placeholder or streamed preview with the final text"""
+        with self._tokens_lock:
+            self._answer_id += 1
+            self._pending_tokens = []
+            self._preview_discarded = False
+        if not self._answer_active:
+            return
+        self._answer_active = False
+        
+        self.chat_display.config(state=tk.NORMAL)
+        self.chat_display.delete("answer_start", "answer_end")
+        if tag:
+            self.chat_display.insert("answer_end", text, tag)
+        else:
+            self.chat_display.insert("answer_end", text)
+        self.chat_display.see(tk.END)
+        self.chat_display.config(state=tk.DISABLED)
+        
+    def _show_response(self, answer, source_documents, model=None):
         """Show response in chat"""
-        self._remove_thinking_message()
-        self.add_message("assistant", answer)
+        self._finish_answer(answer)
+        if self.prefetcher is not None:
+            self.prefetcher.invalidate()
         
         if source_documents:
             sources_info = f"\n Sources referenced: {len(source_documents)} document(s)"
+            if model and len(getattr(self.app_controller.assistant, "model_names", ())) > 1:
+                sources_info += f" • Answered by: {model}"
             self.add_message("system", sources_info)
             
         self.ask_btn.config(state=tk.NORMAL)
@@ -185,29 +427,7 @@ class ChatFrame(ttk.LabelFrame):
         
     def _show_error(self, error_msg):
         """Show error message"""
-        self._remove_thinking_message()
-        self.add_message("system", f" {error_msg}")
+        self._finish_answer(f" {error_msg}", "system")
         self.ask_btn.config(state=tk.NORMAL)
         self.question_entry.config(state=tk.NORMAL)
         self.question_entry.focus()
-        
-    def _remove_thinking_message(self):
-        """Remove the thinking message from chat"""
-        self.chat_display.config(state=tk.NORMAL)
-        content = self.chat_display.get("1.0", tk.END)
-        if "Thinking..." in content:
-            lines = content.split('\n')
-            new_content = []
-            skip_next = False
-            for line in lines:
-                if "Thinking..." in line:
-                    skip_next = True
-                    continue
-                if skip_next and line == "":
-                    skip_next = False
-                    continue
-                new_content.append(line)
-            
-            self.chat_display.delete("1.0", tk.END)
-            self.chat_display.insert("1.0", '\n'.join(new_content))
-        self.chat_display.config(state=tk.DISABLED)
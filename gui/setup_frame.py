@@ -7,6 +7,10 @@ import os
 import threading
 from core.ollama_manager import OllamaManager
 from core.document_processor import DocumentProcessor
+from core.folder_scanner import folder_scanner
+from core.config import ROUTING_FAST_MODEL
+
+NO_FAST_MODEL = "(none)"
 
 class SetupFrame(ttk.LabelFrame):
     def __init__(self, parent, app_controller):
@@ -88,6 +92,18 @@ class SetupFrame(ttk.LabelFrame):
         model_combo.bind('<<ComboboxSelected>>', self.on_model_selected)
         self.update_model_status()
         
+        # Optional fast model for simple questions
+        ttk.Label(model_frame, text="Fast model for simple questions (optional):",
+                 font=('Arial', 10, 'bold')).pack(anchor=tk.W, pady=(10, 5))
+        
+        self.fast_model_var = tk.StringVar(value=ROUTING_FAST_MODEL or NO_FAST_MODEL)
+        fast_model_combo = ttk.Combobox(model_frame, textvariable=self.fast_model_var,
+                                       values=[NO_FAST_MODEL] + all_models, state="readonly", width=20)
+        fast_model_combo.pack(anchor=tk.W, pady=5)
+        
+        ttk.Label(model_frame, text="Simple lookups go to the fast model; harder or unanswered questions use the model above",
+                 foreground='gray', font=('Arial', 9)).pack(anchor=tk.W, pady=2)
+        
     def on_model_selected(self, event=None):
         """Update model status when selection changes"""
         self.update_model_status()
@@ -109,27 +125,27 @@ class SetupFrame(ttk.LabelFrame):
         
         if folder_path:
             self.doc_path_var.set(folder_path)
-            supported_files, total_files = self.scan_folder(folder_path)
-            if supported_files == 0:
-                self.status_var.set(f" No .txt files found. I'll create a sample document.")
-            else:
-                self.status_var.set(f"Found {supported_files} supported file(s) out of {total_files} total files")
+            self.status_var.set("Scanning folder...")
+            threading.Thread(target=self.scan_folder, args=(folder_path,), daemon=True).start()
                 
     def scan_folder(self, folder_path):
-        """Scan folder for supported files"""
+        """Scan folder for supported files in background thread"""
         try:
-            all_files = []
-            supported_files = []
-            
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    all_files.append(file)
-                    if file.lower().endswith('.txt'):
-                        supported_files.append(os.path.join(root, file))
-            
-            return len(supported_files), len(all_files)
-        except:
-            return 0, 0
+            snapshot = folder_scanner.scan(folder_path)
+        except Exception as e:
+            print(f"Error scanning folder: {e}")
+            return
+        self.app_controller.root.after(0, lambda: self._on_folder_scanned(snapshot))
+        
+    def _on_folder_scanned(self, snapshot):
+        """Show scan results, ignoring scans of a folder that is no longer selected"""
+        if snapshot.root != self.doc_path_var.get():
+            return
+        supported_files = len(snapshot.text_files)
+        if supported_files == 0:
+            self.status_var.set(f" No .txt files found. I'll create a sample document.")
+        else:
+            self.status_var.set(f"Found {supported_files} supported file(s) out of {snapshot.total_files} total files")
             
     def initialize_system(self):
         """Initialize the RAG system with selected folder"""
@@ -160,11 +176,14 @@ class SetupFrame(ttk.LabelFrame):
         """Initialize backend components in background thread"""
         try:
             selected_model = self.model_var.get()
+            fast_model = self.fast_model_var.get()
+            if fast_model == NO_FAST_MODEL:
+                fast_model = None
             document_processor = DocumentProcessor()
             
             # Initialize the system
             assistant, folder_info = document_processor.initialize_system(
-                folder_path, selected_model, self.update_status
+                folder_path, selected_model, self.update_status, fast_model
             )
             
             # Notify main application
@@ -0,0 +1,44 @@
+"""
+Checks which questions are condensed with the previous turn's topic
+"""
+import pytest
+from core.conversation import ConversationSession
+
+PREVIOUS = "What is the capital of France?"
+
+
+@pytest.fixture
+def session(tmp_path):
+    session = ConversationSession(storage_dir=str(tmp_path))
+    session.add_turn(PREVIOUS, PREVIOUS, "Paris.")
+    return session
+
+
+@pytest.mark.parametrize("question", [
+    "How many people live there?",
+    "What about its population?",
+    "How big is it?",
+    "Why is that?",
+    "And the currency?",
+])
+def test_follow_ups_get_the_previous_topic(session, question):
+    assert session.condense_question(question) == f"capital france {question}"
+
+
+@pytest.mark.parametrize("question", [
+    "What is Python?",
+    "Tell me about Japan",
+    "Who is Obama?",
+    "What are the main topics in these documents?",
+    "Is there a visa requirement for Japan?",
+    "What should I know about this content?",
+    "Summarize the key points",
+    "How does it compare with the population growth rate of Berlin over decades?",
+])
+def test_standalone_questions_are_unchanged(session, question):
+    assert session.condense_question(question) == question
+
+
+def test_first_question_is_unchanged(tmp_path):
+    session = ConversationSession(storage_dir=str(tmp_path))
+    assert session.condense_question("How big is it?") == "How big is it?"
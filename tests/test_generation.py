@@ -0,0 +1,118 @@
+"""
+Checks the options and keep-alive actually sent to Ollama, against the recording stub
+"""
+import importlib.util
+import time
+import pytest
+from core import ollama_manager
+from core.generation import GenerationProfile, KeepAliveHeartbeat
+from utils.ollama_stub import OllamaStub
+
+MODEL = "llama3:8b"
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Recording Ollama stub on a free port, with the app pointed at it"""
+    server = OllamaStub(port=0).start()
+    monkeypatch.setenv("OLLAMA_HOST", server.url)
+    monkeypatch.setattr("core.config.OLLAMA_HOST", server.url)
+    monkeypatch.setattr(ollama_manager, "OLLAMA_HOST", server.url)
+    yield server
+    server.stop()
+
+
+def generate_requests(stub):
+    """Recorded /api/generate requests that carried a prompt"""
+    return [r for r in stub.requests if r["path"] == "/api/generate" and r.get("prompt")]
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_profile_caps_num_predict_only_when_asked():
+    profile = GenerationProfile(MODEL, num_predict=512, num_ctx=2048, num_thread=4)
+    assert profile.options() == {"temperature": 0.1, "num_predict": 512,
+                                 "num_ctx": 2048, "num_thread": 4}
+    assert profile.options(max_tokens=64)["num_predict"] == 64
+    assert profile.options(max_tokens=4096)["num_predict"] == 512
+
+
+def test_heartbeat_interval_is_capped_by_keep_alive():
+    assert KeepAliveHeartbeat(MODEL, "2m", interval=240).interval == 60
+    assert KeepAliveHeartbeat(MODEL, "10m", interval=240).interval == 240
+    assert KeepAliveHeartbeat(MODEL, "-1", interval=240).interval == 240
+
+
+def test_heartbeat_sends_keep_alive(stub):
+    heartbeat = KeepAliveHeartbeat(MODEL, keep_alive="7m", interval=0.05)
+    heartbeat.start()
+    try:
+        assert wait_for(lambda: stub.requests)
+    finally:
+        heartbeat.stop()
+    request = stub.requests[0]
+    assert request["path"] == "/api/generate"
+    assert request["model"] == MODEL
+    assert request["keep_alive"] == "7m"
+    assert not request.get("prompt")
+
+
+@pytest.fixture
+def pipeline_module(stub, monkeypatch):
+    rag_pipeline = pytest.importorskip("core.rag_pipeline")
+    monkeypatch.setattr(rag_pipeline, "OLLAMA_HOST", stub.url)
+    return rag_pipeline
+
+
+def expected_keep_alive(profile):
+    # The langchain_community fallback has no keep_alive field
+    return profile.keep_alive if importlib.util.find_spec("langchain_ollama") else None
+
+
+def test_llm_sends_profile_options(stub, pipeline_module):
+    profile = GenerationProfile(MODEL, num_predict=300, num_ctx=2048, num_thread=3, keep_alive="15m")
+    pipeline = pipeline_module.RAGPipeline.__new__(pipeline_module.RAGPipeline)
+    llm = pipeline._get_llm(MODEL, profile)
+
+    assert "Stub answer" in llm.invoke("Say something")
+    request = generate_requests(stub)[-1]
+    assert request["model"] == MODEL
+    assert request["options"]["num_ctx"] == 2048
+    assert request["options"]["num_thread"] == 3
+    assert request["options"]["num_predict"] == 300
+    assert request.get("keep_alive") == expected_keep_alive(profile)
+
+
+def test_generate_caps_num_predict_per_call(stub, pipeline_module):
+    from langchain.chains.question_answering import load_qa_chain
+    from langchain.prompts import PromptTemplate
+    from langchain.schema import Document
+
+    profile = GenerationProfile(MODEL, num_predict=300, num_ctx=2048, num_thread=3, keep_alive="15m")
+    pipeline = pipeline_module.RAGPipeline.__new__(pipeline_module.RAGPipeline)
+    prompt = PromptTemplate(template="{history}{context}\n{question}",
+                            input_variables=["context", "history", "question"])
+    chain = load_qa_chain(pipeline._get_llm(MODEL, profile), chain_type="stuff", prompt=prompt)
+    assistant = pipeline_module.RAGAssistant(qa_chain=None)
+    assistant.add_model(MODEL, chain, profile)
+    documents = [Document(page_content="Paris is the capital of France.")]
+    try:
+        assistant._generate(MODEL, "Capital?", documents, {})
+        assistant._generate(MODEL, "Capital?", documents, {"max_tokens": 40})
+    finally:
+        assistant.close()
+
+    uncapped, capped = generate_requests(stub)[-2:]
+    for request in (uncapped, capped):
+        assert request["options"]["num_ctx"] == 2048
+        assert request["options"]["num_thread"] == 3
+        assert request.get("keep_alive") == expected_keep_alive(profile)
+    assert uncapped["options"]["num_predict"] == 300
+    assert capped["options"]["num_predict"] == 40
@@ -0,0 +1,109 @@
+"""
+Local Ollama stand-in that records the requests it receives
+
+Run it and point the app at it to check which runtime options, keep-alive
+values and prompts are actually sent, without loading a model:
+
+    python -m utils.ollama_stub --port 11435 --log ollama_requests.jsonl
+    OLLAMA_HOST=http://localhost:11435 python main.py
+"""
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class OllamaStub:
+    """Minimal /api/generate server; every request body is kept in self.requests"""
+
+    def __init__(self, port=11435, log_path=None, reply="Stub answer."):
+        self.requests = []
+        self.log_path = log_path
+        self.reply = reply
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _record(self, path, body):
+        entry = {"path": path, **body}
+        with self._lock:
+            self.requests.append(entry)
+            if self.log_path:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json_lines(self, lines):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                for line in lines:
+                    self.wfile.write((json.dumps(line) + "\n").encode("utf-8"))
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json_lines([{"models": []}])
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    body = {}
+                stub._record(self.path, body)
+                if self.path != "/api/generate":
+                    self.send_error(404)
+                    return
+
+                model = body.get("model", "")
+                if not body.get("prompt"):
+                    # Load-only request (keep-alive / warm-up)
+                    self._send_json_lines([{"model": model, "response": "", "done": True}])
+                elif body.get("stream", True):
+                    words = [f"{word} " for word in stub.reply.split()]
+                    lines = [{"model": model, "response": word, "done": False} for word in words]
+                    lines.append({"model": model, "response": "", "done": True, "done_reason": "stop"})
+                    self._send_json_lines(lines)
+                else:
+                    self._send_json_lines([{"model": model, "response": stub.reply, "done": True}])
+
+        return Handler
+
+    def start(self):
+        """Serve on a background thread"""
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record requests sent to Ollama")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--log", default="ollama_requests.jsonl")
+    args = parser.parse_args()
+
+    stub = OllamaStub(args.port, args.log)
+    print(f"Ollama stub listening on {stub.url}, logging to {args.log}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()